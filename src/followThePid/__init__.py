@@ -1,4 +1,8 @@
 __version__ = "0.1.0"
 
 from .controller import FollowThePid
-__all__ = ["FollowThePid", "__version__"]
+from .budget import EnergyBudget
+from .remote import Agent, Collector
+from .calibration import PowerModel
+from .analysis import analyze_traces
+__all__ = ["FollowThePid", "EnergyBudget", "Agent", "Collector", "PowerModel", "analyze_traces", "__version__"]
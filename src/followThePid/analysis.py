@@ -0,0 +1,178 @@
+import glob, hashlib, json, logging, os
+from concurrent.futures import ProcessPoolExecutor
+import pandas as pd
+
+SUMMARY_COLUMNS = ["file", "pid", "samples", "energy_j", "dynamic_energy_j", "package_energy_j",
+                   "cpu_PIDs_mean", "cpu_PIDs_max", "duration_s", "error"]
+CACHE_FILE = "followThePid_analysis_cache.json"
+
+NUMERIC_COLUMNS = ["pid", "cpu_PIDs", "cpu_system", "energy_uj", "interval_s"]
+
+_known_hashes = frozenset()  # content hashes already cached, set in each worker
+
+
+def _file_hash(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def summarize_trace(path: str, idle_power: float = 0.0, chunksize: int = 100_000) -> dict:
+    """
+    Computes the summary of one followThePid CSV trace (see MetricsHandler.samples_csv).
+    :param path: CSV trace file.
+    :param idle_power: Idle power (Watts) removed for the dynamic energy, needs the interval_s column.
+    :param chunksize: Number of rows parsed at once.
+    """
+    samples = 0
+    energy = dynamic_energy = package_energy = 0.0
+    cpu_sum, cpu_max, duration = 0.0, 0.0, 0.0
+    pid = None
+
+    for chunk in pd.read_csv(path, chunksize=chunksize):
+        if chunk.empty:
+            continue
+        for column in NUMERIC_COLUMNS:
+            if column in chunk:
+                chunk[column] = pd.to_numeric(chunk[column], errors="raise")  # ValueError on malformed values
+        if pid is None:
+            pid = int(chunk["pid"].iloc[0])
+
+        share = (chunk["cpu_PIDs"] / chunk["cpu_system"]).where(chunk["cpu_system"] > 0, 0.0)
+        energy += float((chunk["energy_uj"] * share).sum())
+        package_energy += float(chunk["energy_uj"].sum())
+
+        if "interval_s" in chunk:
+            interval = chunk["interval_s"].fillna(0.0)
+            duration += float(interval.sum())
+            dynamic = (chunk["energy_uj"] - idle_power * interval * 1_000_000).clip(lower=0.0)
+            dynamic_energy += float((dynamic * share).sum())
+        else:
+            dynamic_energy += float((chunk["energy_uj"] * share).sum())
+
+        samples += len(chunk)
+        cpu_sum += float(chunk["cpu_PIDs"].sum())
+        cpu_max = max(cpu_max, float(chunk["cpu_PIDs"].max()))
+
+    return {
+        "file": path,
+        "pid": pid,
+        "samples": samples,
+        "energy_j": energy / 1_000_000,
+        "dynamic_energy_j": dynamic_energy / 1_000_000,
+        "package_energy_j": package_energy / 1_000_000,
+        "cpu_PIDs_mean": cpu_sum / samples if samples else 0.0,
+        "cpu_PIDs_max": cpu_max,
+        "duration_s": duration,
+    }
+
+
+def _init_worker(known_hashes: frozenset):
+    global _known_hashes
+    _known_hashes = known_hashes
+
+
+def _summarize(args) -> dict:
+    """
+    Worker task: hashes the trace (when caching) and summarizes it, unless a trace
+    with the same content is already cached. Errors are reported in the summary.
+    """
+    path, idle_power, chunksize, use_hash = args
+    digest = None
+    try:
+        if use_hash:
+            digest = _file_hash(path)
+            if digest in _known_hashes:
+                return {"file": path, "sha256": digest, "cached": True}
+        summary = summarize_trace(path, idle_power=idle_power, chunksize=chunksize)
+    except (OSError, ValueError, TypeError, KeyError, pd.errors.ParserError) as e:
+        return {"file": path, "sha256": digest, "error": f"{type(e).__name__}: {e}"}
+    summary["sha256"] = digest
+    return summary
+
+
+def _load_cache(path: str) -> dict:
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def analyze_traces(pattern: str, max_workers: int = None, cache_dir: str = None, idle_power: float = 0.0,
+                   chunksize: int = 100_000) -> pd.DataFrame:
+    """
+    Summarizes all the followThePid CSV traces matching a glob pattern in parallel.
+
+    Results are cached in ``cache_dir`` by file path, mtime and content hash, so that
+    re-runs only parse new or modified traces.
+
+    :param pattern: Glob pattern of the trace files (recursive ``**`` is supported).
+    :param max_workers: Number of worker processes, defaults to the number of cores.
+    :param cache_dir: Directory of the results cache, no caching if None.
+    :param idle_power: Idle power (Watts) removed for the dynamic energy.
+    :param chunksize: Number of rows parsed at once.
+    :return: DataFrame with one summary row per trace and a final "TOTAL" row. Traces that
+        cannot be parsed have their reason in the "error" column and are left out of the total.
+    """
+    paths = sorted(glob.glob(pattern, recursive=True))
+
+    cache_path = os.path.join(cache_dir, CACHE_FILE) if cache_dir else None
+    cache = _load_cache(cache_path) if cache_path else {}
+    by_hash = {entry["summary"]["sha256"]: entry for entry in cache.values() if entry.get("idle_power") == idle_power}
+
+    results, todo = {}, []
+    for path in paths:
+        stat = os.stat(path)
+        entry = cache.get(path)
+        if (entry and entry["mtime"] == stat.st_mtime and entry["size"] == stat.st_size
+                and entry.get("idle_power") == idle_power):
+            results[path] = entry["summary"]
+            continue
+        todo.append((path, idle_power, chunksize, cache_path is not None))
+
+    logging.info(f"Analyzing {len(todo)} traces ({len(paths) - len(todo)} cached)")
+
+    try:
+        if todo:
+            workers = max_workers or os.cpu_count() or 1
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                     initargs=(frozenset(by_hash),)) as executor:
+                for summary in executor.map(_summarize, todo, chunksize=max(1, len(todo) // (workers * 4))):
+                    path = summary["file"]
+                    if summary.get("cached"):
+                        summary = dict(by_hash[summary["sha256"]]["summary"], file=path)
+                    elif summary.get("error"):
+                        logging.warning(f"Skipping trace {path}: {summary['error']}")
+                        results[path] = summary
+                        continue
+
+                    results[path] = summary
+                    stat = os.stat(path)
+                    cache[path] = {"mtime": stat.st_mtime, "size": stat.st_size, "idle_power": idle_power,
+                                   "summary": summary}
+    finally:
+        if cache_path:
+            os.makedirs(cache_dir, exist_ok=True)
+            with open(cache_path, "w") as f:
+                json.dump(cache, f)
+
+    df = pd.DataFrame([results[p] for p in paths], columns=SUMMARY_COLUMNS)
+    if df.empty:
+        return df
+
+    total = {
+        "file": "TOTAL",
+        "pid": None,
+        "samples": int(df["samples"].sum()),
+        "energy_j": df["energy_j"].sum(),
+        "dynamic_energy_j": df["dynamic_energy_j"].sum(),
+        "package_energy_j": df["package_energy_j"].sum(),
+        "cpu_PIDs_mean": (df["cpu_PIDs_mean"] * df["samples"]).sum() / max(df["samples"].sum(), 1),
+        "cpu_PIDs_max": df["cpu_PIDs_max"].max(),
+        "duration_s": df["duration_s"].sum(),
+        "error": None,
+    }
+    return pd.concat([df, pd.DataFrame([total])], ignore_index=True)
@@ -0,0 +1,184 @@
+import logging, signal, time
+from collections import deque
+import psutil
+
+class EnergyBudget():
+    """
+    Keeps a monitored process tree inside a power and/or energy budget.
+
+    Attributed power is averaged over a sliding window; when it exceeds
+    ``max_power`` the configured action is applied to the process tree.
+    """
+
+    ACTIONS = ("duty_cycle", "nice", "affinity", "kill")
+
+    def __init__(self, max_power: float = None, max_energy: float = None, window: float = 1.0,
+                 action: str = "duty_cycle", pause: float = 0.1):
+        """
+        :param max_power: Power threshold in Watts, averaged over ``window``.
+        :param max_energy: Total energy threshold in Joules; the job is killed past it.
+        :param window: Length in seconds of the sliding window used to average power.
+        :param action: Action applied when ``max_power`` is exceeded (see ``ACTIONS``).
+        :param pause: Time in seconds the tree stays stopped in ``duty_cycle`` mode.
+        """
+        if max_power is None and max_energy is None:
+            raise ValueError("At least one of max_power or max_energy must be set.")
+        if action not in self.ACTIONS:
+            raise ValueError(f"Unknown budget action '{action}'. Supported actions are {self.ACTIONS}.")
+        if window <= 0 or pause <= 0:
+            raise ValueError("Window and pause must be positive.")
+
+        self.max_power = max_power
+        self.max_energy = max_energy
+        self.window = window
+        self.action = action
+        self.pause = pause
+
+        self.history = deque()  # (timestamp, energy in J)
+        self.window_energy = 0.0
+        self.total_energy = 0.0
+        self.paused_at = None
+        self.stopped = []
+        self.decisions = []  # (timestamp, action, power in W)
+
+    def get_power(self, now: float) -> float:
+        """
+        Returns the average attributed power (Watts) over the sliding window.
+        """
+        while self.history and self.history[0][0] < now - self.window:
+            _, energy = self.history.popleft()
+            self.window_energy -= energy
+
+        if len(self.history) < 2:
+            return 0.0
+
+        # Each sample holds the energy of the interval ending at its timestamp,
+        # so the oldest one falls outside [oldest, now]
+        start, first_energy = self.history[0]
+        span = now - start
+        if span <= 0:
+            return 0.0
+        return (self.window_energy - first_energy) / span
+
+    def tick(self, now: float = None):
+        """
+        Resumes the tree once the duty-cycle pause has elapsed. Called on every
+        loop iteration, independently of whether a sample could be taken.
+        """
+        now = time.monotonic() if now is None else now
+
+        if self.paused_at is not None and now - self.paused_at >= self.pause:
+            self._log(now, "resume", self.get_power(now), "pause elapsed")
+            self.release()
+
+    def update(self, sample, pid: int, now: float = None) -> bool:
+        """
+        Accounts a new sample and applies the configured action if needed.
+        :param sample: MetricSample just collected.
+        :param pid: PID of the root of the monitored tree, rescanned when an action is applied.
+        :param now: Timestamp of the sample, defaults to time.monotonic().
+        :return: True if the job has been killed.
+        """
+        now = time.monotonic() if now is None else now
+
+        energy = 0.0
+        if sample.cpu_system:
+            energy = sample.energy * (sample.cpu_PIDs / sample.cpu_system) / 1_000_000  # J
+
+        self.history.append((now, energy))
+        self.window_energy += energy
+        self.total_energy += energy
+        power = self.get_power(now)
+
+        if self.max_energy is not None and self.total_energy > self.max_energy:
+            self._log(now, "kill", power, f"energy budget of {self.max_energy:.2f} J exceeded")
+            self._kill(self._get_process_tree(pid))
+            return True
+
+        if self.paused_at is not None:
+            return False
+
+        if self.max_power is None or power <= self.max_power:
+            return False
+
+        reason = f"power {power:.2f} W over budget of {self.max_power:.2f} W"
+        processes = self._get_process_tree(pid)
+        if self.action == "duty_cycle":
+            self._log(now, "stop", power, reason)
+            self._stop(processes)
+            self.paused_at = now
+        elif self.action == "nice":
+            self._log(now, "nice", power, reason)
+            self._renice(processes)
+        elif self.action == "affinity":
+            self._log(now, "affinity", power, reason)
+            self._narrow_affinity(processes)
+        elif self.action == "kill":
+            self._log(now, "kill", power, reason)
+            self._kill(processes)
+            return True
+
+        # Start a fresh window so the effect of the action is measured before acting again
+        self.history.clear()
+        self.window_energy = 0.0
+        return False
+
+    @staticmethod
+    def _get_process_tree(pid: int) -> list:
+        """
+        Scans the current process tree, so that children spawned after the
+        first sample are reached as well.
+        """
+        try:
+            root = psutil.Process(pid)
+            return [root] + root.children(recursive=True)
+        except psutil.NoSuchProcess:
+            return []
+
+    def release(self):
+        """
+        Resumes any process previously stopped by the budget.
+        """
+        for p in self.stopped:
+            try:
+                p.send_signal(signal.SIGCONT)
+            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                continue
+        self.stopped = []
+        self.paused_at = None
+
+    def _log(self, now: float, action: str, power: float, reason: str):
+        self.decisions.append((now, action, power))
+        logging.warning(f"Energy budget: {action} ({reason})")
+
+    def _stop(self, processes: list):
+        for p in processes:
+            try:
+                p.send_signal(signal.SIGSTOP)
+                self.stopped.append(p)
+            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                continue
+
+    def _renice(self, processes: list):
+        for p in processes:
+            try:
+                p.nice(min(p.nice() + 5, 19))
+            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                continue
+
+    def _narrow_affinity(self, processes: list):
+        for p in processes:
+            try:
+                cpus = p.cpu_affinity()
+                if len(cpus) > 1:
+                    p.cpu_affinity(cpus[:len(cpus) // 2])
+            except (psutil.NoSuchProcess, psutil.AccessDenied, AttributeError):
+                continue
+
+    def _kill(self, processes: list):
+        self.release()
+        for p in processes:
+            try:
+                p.kill()
+            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                continue
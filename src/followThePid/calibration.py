@@ -0,0 +1,173 @@
+import json, logging, multiprocessing, os, platform, re, time
+import numpy as np
+import psutil
+
+CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "followThePid")
+
+
+def get_cpu_model() -> str:
+    """
+    Returns the CPU model name of the machine.
+    """
+    try:
+        with open("/proc/cpuinfo") as f:
+            for line in f:
+                if line.startswith("model name"):
+                    return line.split(":", 1)[1].strip()
+    except OSError:
+        pass
+
+    return platform.processor() or platform.machine() or "unknown"
+
+
+def _spin(stop):
+    while not stop.is_set():
+        pass
+
+
+class PowerModel():
+    """
+    Linear power-vs-utilisation model of a machine: P = idle_power + slope * utilisation.
+    """
+
+    def __init__(self, idle_power: float, slope: float, cpu_model: str, sockets: int):
+        """
+        :param idle_power: Static/idle power in Watts.
+        :param slope: Dynamic power in Watts at full system utilisation.
+        :param cpu_model: CPU model name the model was fitted on.
+        :param sockets: Number of CPU sockets the model was fitted on.
+        """
+        self.idle_power = idle_power
+        self.slope = slope
+        self.cpu_model = cpu_model
+        self.sockets = sockets
+
+    def predict(self, utilisation: float) -> float:
+        """
+        Returns the expected power in Watts at the given system utilisation [0,1].
+        """
+        return self.idle_power + self.slope * utilisation
+
+    @staticmethod
+    def cache_path(cpu_model: str, sockets: int, cache_dir: str = None) -> str:
+        """
+        Returns the cache file of the model for a CPU model and socket count.
+        """
+        key = re.sub(r"[^A-Za-z0-9]+", "_", cpu_model).strip("_").lower()
+        return os.path.join(cache_dir or CACHE_DIR, f"{key}-{sockets}s.json")
+
+    def save(self, cache_dir: str = None) -> str:
+        """
+        Writes the model to the on-disk cache.
+        """
+        path = self.cache_path(self.cpu_model, self.sockets, cache_dir)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            json.dump({
+                "cpu_model": self.cpu_model,
+                "sockets": self.sockets,
+                "idle_power": self.idle_power,
+                "slope": self.slope,
+            }, f, indent=2)
+        return path
+
+    @classmethod
+    def load(cls, cpu_model: str, sockets: int, cache_dir: str = None):
+        """
+        Reads a model from the on-disk cache.
+        :return: PowerModel, or None if no valid model is cached.
+        """
+        path = cls.cache_path(cpu_model, sockets, cache_dir)
+        try:
+            with open(path) as f:
+                data = json.load(f)
+            return cls(
+                idle_power=float(data["idle_power"]),
+                slope=float(data["slope"]),
+                cpu_model=data["cpu_model"],
+                sockets=int(data["sockets"]),
+            )
+        except (OSError, ValueError, KeyError) as e:
+            logging.debug(f"No cached power model at {path}: {e}")
+            return None
+
+
+def _measure(device, duration: float):
+    """
+    Measures average power (W) and system utilisation [0,1] over `duration` seconds.
+    """
+    interval = device.sampling_interval
+    device.get_energy()  # reset the energy counter
+    psutil.cpu_percent(interval=None)
+
+    energy = 0.0
+    start = time.monotonic()
+    while time.monotonic() - start < duration:
+        time.sleep(interval)
+        energy += device.get_energy()  # uJ
+    elapsed = time.monotonic() - start
+
+    utilisation = psutil.cpu_percent(interval=None) / 100.0
+    return energy / 1_000_000 / elapsed, utilisation
+
+
+def calibrate(device, sockets: int, levels=(0.0, 0.25, 0.5, 0.75, 1.0), duration: float = 2.0) -> PowerModel:
+    """
+    Fits a PowerModel by loading an increasing number of cores with busy loops.
+    :param device: Energy device (see device.factory.Device).
+    :param sockets: Number of CPU sockets.
+    :param levels: Fractions of logical cores to load.
+    :param duration: Measurement time in seconds for each level.
+    """
+    num_cores = psutil.cpu_count(logical=True) or 1
+    points = []
+
+    for level in levels:
+        stop = multiprocessing.Event()
+        workers = [multiprocessing.Process(target=_spin, args=(stop,), daemon=True)
+                   for _ in range(int(level * num_cores + 0.5))]
+        for w in workers:
+            w.start()
+        try:
+            time.sleep(min(0.5, duration))  # let the load settle
+            power, utilisation = _measure(device, duration)
+        finally:
+            stop.set()
+            for w in workers:
+                w.join()
+
+        logging.info(f"Calibration: {len(workers)} busy cores, {utilisation:.2f} utilisation, {power:.2f} W")
+        points.append((utilisation, power))
+
+    utils = np.array([p[0] for p in points])
+    powers = np.array([p[1] for p in points])
+    if np.ptp(utils) < 0.05:
+        raise RuntimeError("Calibration failed: utilisation did not vary across load levels.")
+    slope, idle_power = np.polyfit(utils, powers, 1)
+
+    return PowerModel(
+        idle_power=max(float(idle_power), 0.0),
+        slope=float(slope),
+        cpu_model=get_cpu_model(),
+        sockets=sockets,
+    )
+
+
+def get_power_model(device, sockets: int, cache_dir: str = None, recalibrate: bool = False, **kwargs) -> PowerModel:
+    """
+    Loads the cached PowerModel of this machine, calibrating and caching it if missing.
+    """
+    cpu_model = get_cpu_model()
+
+    if not recalibrate:
+        model = PowerModel.load(cpu_model, sockets, cache_dir)
+        if model is not None:
+            logging.info(f"Loaded power model for {cpu_model} ({sockets} sockets): "
+                         f"idle {model.idle_power:.2f} W, slope {model.slope:.2f} W")
+            return model
+
+    logging.info(f"Calibrating power model for {cpu_model} ({sockets} sockets)")
+    model = calibrate(device, sockets, **kwargs)
+    path = model.save(cache_dir)
+    logging.info(f"Power model cached at {path}")
+    return model
@@ -1,7 +1,11 @@
-import psutil, subprocess, shlex, logging, os, time
-from .device.factory import Device
+import psutil, subprocess, shlex, shutil, logging, errno, os, sys, time
+from .device.factory import Device, get_num_sockets
 from .cpu import CPUManager
 from .metrics import MetricSample, MetricsHandler
+from .budget import EnergyBudget
+from .remote import Agent
+from .calibration import PowerModel, get_power_model
+from . import reaper
 
 
 class ProcessEnergyMonitorError(Exception):
@@ -14,13 +18,16 @@ class ProcessNotFoundError(ProcessEnergyMonitorError):
         super().__init__(msg)
 
 class FollowThePid:
-    def __init__(self, cmd: str, sampling_interval: float = 0.1):
+    def __init__(self, cmd: str, sampling_interval: float = 0.1, power_model: PowerModel = None,
+                 capture_exited: bool = False):
         """
         Initializes the energy monitor for a specific process.
 
         Args:
             cmd (str, optional): A shell command to execute and monitor
             sampling_interval (float): Sampling interval in seconds
+            power_model (PowerModel, optional): Calibrated power model of the machine
+            capture_exited (bool): Account the CPU time of short-lived processes that exit between samples
         """
 
         logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -28,38 +35,76 @@ class FollowThePid:
         self.cmd = cmd
         self.sampling_interval = sampling_interval
         
+        if capture_exited and not sys.platform.startswith("linux"):
+            raise ProcessEnergyMonitorError("capture_exited is only supported on Linux.")
+
         self.device = Device(sampling_interval=sampling_interval)
-        self.cpu = CPUManager(sampling_interval=sampling_interval, num_cores=psutil.cpu_count(logical=True) or 1)
+        self.capture_exited = capture_exited
+        self.cpu = CPUManager(sampling_interval=sampling_interval, num_cores=psutil.cpu_count(logical=True) or 1,
+                              capture_exited=capture_exited)
         self.metrics = MetricsHandler()
+        self.power_model = power_model
+        self.last_measurement = time.monotonic()
+        self.pending_energy = 0.0  # uJ read during skipped measurements
+
+    def calibrate(self, cache_dir: str = None, recalibrate: bool = False, **kwargs) -> PowerModel:
+        """
+        Loads the cached power model of this machine, or calibrates it when missing.
+
+        Args:
+            cache_dir (str, optional): Directory of the power model cache
+            recalibrate (bool): Ignore the cached model and calibrate again
+        """
+        self.power_model = get_power_model(self.device, get_num_sockets(), cache_dir=cache_dir,
+                                           recalibrate=recalibrate, **kwargs)
+        return self.power_model
         
     def _take_measurement(self):
 
         try:
-            cpu_PIDs = self.cpu.get_cpu_usage() # % [0,1]
-            cpy_system = self.cpu.get_cpu_system()  # % [0,1]
-            energy = self.device.get_energy()
+            if self.capture_exited:
+                cpy_system = self.cpu.get_cpu_system()  # % [0,1]
+                # Bursts of exited processes are spread over the next samples, never above the system usage
+                cpu_PIDs = self.cpu.get_cpu_usage(limit=cpy_system) if cpy_system is not None else None
+            else:
+                cpu_PIDs = self.cpu.get_cpu_usage() # % [0,1]
+                cpy_system = self.cpu.get_cpu_system()  # % [0,1]
+            energy = self.device.get_energy()  # uJ
         except Exception as e:
             logging.warning(f"Measurement failed: {e}")
             return None
 
         if cpu_PIDs is None or cpy_system is None:
+            # Keep the energy for the next sample, whose interval covers this one too
+            self.pending_energy += energy
             logging.debug("Skipping sample, incomplete CPU metrics")
             return None
+
+        energy += self.pending_energy
+        self.pending_energy = 0.0
         
-        energy = self.device.get_energy()  # uJ
+        now = time.monotonic()
+        interval = now - self.last_measurement
+        self.last_measurement = now
         
         sample = MetricSample(
             pid = self.cpu.get_pid(),
             cpu_PIDs = cpu_PIDs,
             cpu_system = cpy_system,
-            energy = energy
+            energy = energy,
+            interval = interval
         )
 
         return sample
 
-    def monitor(self, timeout: int = 10000):
+    def monitor(self, timeout: int = 10000, budget: EnergyBudget = None, agent: Agent = None):
         """
         Starts monitoring the process specified by the command.
+
+        Args:
+            timeout (int, optional): Seconds after which the process is killed
+            budget (EnergyBudget, optional): Power/energy budget enforced on the process tree
+            agent (Agent, optional): Agent streaming the samples to a remote Collector
         """
         logging.info("Starting process monitoring")
 
@@ -70,34 +115,84 @@ class FollowThePid:
 
         if timeout is not None and timeout <= 0:
             raise ValueError("Timeout must be a positive integer or None.")
+
+        if self.capture_exited:
+            # Fail like Popen does in the default mode, instead of inside the reaper
+            if shutil.which(args[0]) is None:
+                raise FileNotFoundError(errno.ENOENT, os.strerror(errno.ENOENT), args[0])
+            # Run the command under a subreaper that reaps (and so accounts) all its orphans
+            args = [sys.executable, os.path.abspath(reaper.__file__)] + args
                     
         self.process = subprocess.Popen(args, shell=False)
         self.cpu.set_pid(self.process.pid)
 
         start_time = time.time()
+        self.device.get_energy()  # reset the energy counter, the first sample covers only the monitored run
+        self.last_measurement = time.monotonic()
+        self.pending_energy = 0.0
+
+        if agent is not None:
+            agent.start()
 
         # Start monitoring
         try:
-            while self.process.poll() is None:
+            while not self._exited():
                 if timeout and (time.time() - start_time) > timeout:
                     logging.warning("Timeout reached. Killing the process.")
                     self.process.kill()
                     break
+
+                if budget is not None:
+                    budget.tick()  # resume a paused tree even if no sample is taken
                 
                 sample = self._take_measurement()
                 
                 if sample is not None:
                     self.metrics.add_sample(sample)
+
+                    if agent is not None:
+                        agent.push(sample)
+
+                    if budget is not None and budget.update(sample, self.process.pid):
+                        logging.warning("Budget exceeded. Killing the process.")
+                        self.process.kill()
+                        break
+
+            if self.capture_exited:
+                # The exited reaper is not reaped yet: its children times now include the whole tree
+                sample = self._take_measurement()
+                if sample is not None:
+                    self.metrics.add_sample(sample)
+                    if agent is not None:
+                        agent.push(sample)
+                self.process.wait()
                 
         except ProcessNotFoundError:
             pass
         
         finally:
+            if budget is not None:
+                budget.release()  # never leave the tree stopped
+            if agent is not None:
+                agent.close()  # flush buffered samples
             self.device.close()  # Clean up device resources
 
         logging.info("Process monitoring terminated")
         
         
+    def _exited(self) -> bool:
+        """
+        Checks whether the process has exited. In capture_exited mode the process is
+        not reaped, so that its final CPU times can still be read.
+        """
+        if not self.capture_exited:
+            return self.process.poll() is not None
+
+        try:
+            return os.waitid(os.P_PID, self.process.pid, os.WEXITED | os.WNOHANG | os.WNOWAIT) is not None
+        except ChildProcessError:
+            return True
+
     def samples_csv(self, filename: str = "followThePid_samples.csv"):
         logging.info("Generating CSV of samples at %s", filename)
 
@@ -111,11 +206,19 @@ class FollowThePid:
         logging.info("Generating Pandas DataFrame for samples")
         return self.metrics.samples_pandas()
     
-    def get_pid_energy(self) -> float:
+    def get_pid_energy(self, dynamic_only: bool = False) -> float:
         """
         Returns the total energy consumed by the process in Joules.
+
+        Args:
+            dynamic_only (bool): Attribute only the energy above the calibrated idle power
         """
-        energy = self.metrics.get_pid_energy()
+        if dynamic_only:
+            if self.power_model is None:
+                raise ProcessEnergyMonitorError("dynamic_only requires a power model, call calibrate() first.")
+            energy = self.metrics.get_pid_energy(idle_power=self.power_model.idle_power)
+        else:
+            energy = self.metrics.get_pid_energy()
         logging.info(f"Total energy consumed by PID {self.cpu.get_pid()}: {energy:.2f} J")
         return energy
 
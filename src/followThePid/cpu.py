@@ -1,14 +1,19 @@
-import psutil
+import psutil, time
 
 class CPUManager():
     """
     Manages CPU usage monitoring for a specific process
     """
     
-    def __init__(self, sampling_interval: float, num_cores: int):
+    def __init__(self, sampling_interval: float, num_cores: int, capture_exited: bool = False,
+                 refresh_interval: float = None):
         """
         :param sampling_interval: Time in seconds between each CPU usage measurement.
         :param num_cores: Number of CPU cores to normalize the CPU usage.
+        :param capture_exited: Account the CPU time of exited (short-lived) processes of the tree,
+            the monitored PID must be a subreaper running the command (see reaper.py).
+        :param refresh_interval: Time in seconds between process tree rescans in capture_exited mode,
+            defaults to the sampling interval.
         """
 
         self.sampling_interval = sampling_interval
@@ -16,6 +21,14 @@ class CPUManager():
         self.pid = None
         self.process_tree = []
 
+        self.capture_exited = capture_exited
+        self.refresh_interval = sampling_interval if refresh_interval is None else refresh_interval
+        self.last_refresh = 0.0
+        self.root_time = 0.0
+        self.last_cpu_time = 0.0
+        self.last_time = None
+        self.carry = 0.0
+
 
     def set_pid(self, pid: int):
         """
@@ -23,6 +36,7 @@ class CPUManager():
         :param pid: Process ID to monitor.
         """
         self.pid = pid
+        self.last_time = time.monotonic()
 
     def get_pid(self) -> int:
         """
@@ -54,11 +68,81 @@ class CPUManager():
         except psutil.NoSuchProcess:
             raise Exception(f"Process {self.pid} not found")
         
-    def get_cpu_usage(self) -> float:
+    @staticmethod
+    def _total_cpu_time(p) -> float:
+        """
+        CPU time of a process, including the children it has waited for.
+        """
+        t = p.cpu_times()
+        return t.user + t.system + t.children_user + t.children_system
+
+    def get_cpu_time(self) -> float:
+        """
+        Cumulative CPU time (seconds) of the monitored tree, including exited processes.
+
+        The monitored PID is a subreaper that reaps the command and all its orphans, so
+        exited processes are accounted through its cumulative children times and the
+        cost does not depend on the number of processes spawned. Its own CPU time
+        (the reaper overhead) is not accounted.
+        """
+        now = time.monotonic()
+        if not self.process_tree or now - self.last_refresh >= self.refresh_interval:
+            try:
+                self.process_tree = self._get_process_tree()
+            except Exception:
+                pass
+            self.last_refresh = now
+
+        total = 0.0
+        # Read descendants before their parents: a process reaped in between is then
+        # counted twice rather than lost, and the excess is paid back on the next ticks
+        for p in reversed(self.process_tree):
+            if p.pid == self.pid:
+                continue
+            try:
+                total += self._total_cpu_time(p)
+            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                continue
+
+        try:
+            t = psutil.Process(self.pid).cpu_times()
+            self.root_time = t.children_user + t.children_system
+        except (psutil.NoSuchProcess, psutil.AccessDenied):
+            pass  # already reaped, keep the last known value
+
+        return total + self.root_time
+
+    def _get_cpu_usage_exited(self, limit: float = None) -> float:
+        cpu_time = self.get_cpu_time()
+        now = time.monotonic()
+
+        if self.last_time is None or now <= self.last_time:
+            self.last_time = now
+            return 0.0
+
+        capacity = (now - self.last_time) * self.num_cores  # CPU seconds available in the interval
+        available = cpu_time - self.last_cpu_time + self.carry
+        used = max(available, 0.0)
+        if limit is not None:
+            used = min(used, limit * capacity)
+
+        # Negative deltas and CPU time above the limit (bursts of processes that
+        # exited between samples) are carried over to the next samples
+        self.carry = available - used
+        self.last_cpu_time = cpu_time
+        self.last_time = now
+        return used / capacity
+
+    def get_cpu_usage(self, limit: float = None) -> float:
         """
         Measures the CPU usage of the monitored process.
+        :param limit: Upper bound of the returned usage in capture_exited mode, the excess
+            is spread over the next measurements.
         :return: CPU usage as a percentage normalized by the number of cores.
         """
+        if self.capture_exited:
+            return self._get_cpu_usage_exited(limit)
+
         if not self.process_tree:
             self._warmup_cpu()
 
@@ -0,0 +1,33 @@
+import os
+import sys
+import time
+
+def burn(seconds):
+    """Busy loop until `seconds` of CPU time have been consumed."""
+    start = time.process_time()
+    while time.process_time() - start < seconds:
+        pass
+
+def spawn_short_lived(children, burn_s, orphan_every):
+    """
+    Fork-bomb style workload: spawns many short-lived children, one in `orphan_every` of them
+    daemonizes (double fork) so that its CPU time is not accounted to this process.
+    """
+    print(f"Spawning {children} children burning {burn_s * 1000:.0f} ms each...")
+
+    for i in range(children):
+        pid = os.fork()
+        if pid == 0:
+            if orphan_every and i % orphan_every == 0 and os.fork() != 0:
+                os._exit(0)  # the grandchild is orphaned
+            burn(burn_s)
+            os._exit(0)
+        os.waitpid(pid, 0)
+
+    print("Spawning finished.")
+
+if __name__ == "__main__":
+    children = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    burn_s = float(sys.argv[2]) if len(sys.argv) > 2 else 0.02
+    orphan_every = int(sys.argv[3]) if len(sys.argv) > 3 else 2
+    spawn_short_lived(children, burn_s, orphan_every)
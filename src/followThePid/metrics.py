@@ -7,11 +7,12 @@ class MetricSample():
     Represents a single measurement sample for process energy monitoring.
     """
 
-    def __init__(self, pid: int, cpu_PIDs: float, cpu_system:float, energy: float):
+    def __init__(self, pid: int, cpu_PIDs: float, cpu_system:float, energy: float, interval: float = None):
         self.pid = pid
         self.cpu_PIDs = cpu_PIDs
         self.cpu_system = cpu_system
         self.energy = energy
+        self.interval = interval  # seconds covered by the sample
 
 class MetricsHandler():
     """
@@ -34,14 +35,19 @@ class MetricsHandler():
         """
         self.samples.append(sample)
 
-    def get_pid_energy(self) -> float:
+    def get_pid_energy(self, idle_power: float = 0.0) -> float:
         """
         Calculates the total energy consumed by the process (Joule) based on the samples.
+
+        :param idle_power: Idle power (Watts) subtracted from each sample before attribution,
+            so that only dynamic energy is attributed to the process.
         """
         total_energy = 0.0
 
         for sample in self.samples:
             energy = sample.energy  # uJ
+            if idle_power and sample.interval:
+                energy = max(energy - idle_power * sample.interval * 1_000_000, 0.0)
             cpu_usage = sample.cpu_PIDs  # [0,1]
             cpu_system = sample.cpu_system # [0,1]
 
@@ -60,7 +66,8 @@ class MetricsHandler():
             "pid": sample.pid,
             "cpu_PIDs": sample.cpu_PIDs,
             "cpu_system": sample.cpu_system,
-            "energy_uj": sample.energy
+            "energy_uj": sample.energy,
+            "interval_s": sample.interval
         } for sample in self.samples]
 
         df = pd.DataFrame(data)
@@ -75,7 +82,7 @@ class MetricsHandler():
         
         with open(filename, 'w', newline='') as csvfile:
             writer = csv.writer(csvfile)
-            writer.writerow(["pid", "cpu_PIDs", "cpu_system", "energy_uj"])
+            writer.writerow(["pid", "cpu_PIDs", "cpu_system", "energy_uj", "interval_s"])
             for sample in self.samples:
-                writer.writerow([sample.pid, sample.cpu_PIDs, sample.cpu_system, sample.energy])
+                writer.writerow([sample.pid, sample.cpu_PIDs, sample.cpu_system, sample.energy, sample.interval])
         return True
\ No newline at end of file
@@ -0,0 +1,63 @@
+"""
+Runs a command as child subreaper (Linux only), used by the capture_exited mode.
+
+Orphaned descendants of the command are reparented to this process and reaped
+here, so the CPU time of every exited process of the tree ends up in the
+cumulative children times of this process (/proc/<pid>/stat). The monitor only
+reads them, it never reaps processes itself nor becomes a subreaper. The reaper
+exits with the exit code of the command as soon as the command exits, after
+reaping the orphans that have already exited. Orphans still running (e.g. a
+build daemon) are not waited for: they are reparented to init and their CPU
+time from then on is not accounted.
+
+This module is executed as a script and only depends on the standard library.
+Usage: python reaper.py <command> [args...]
+"""
+import ctypes, os, signal, subprocess, sys
+
+PR_SET_PDEATHSIG = 1
+PR_SET_CHILD_SUBREAPER = 36
+
+
+def main(args: list) -> int:
+    libc = ctypes.CDLL(None, use_errno=True)
+    if libc.prctl(PR_SET_CHILD_SUBREAPER, 1, 0, 0, 0) != 0:
+        sys.stderr.write(f"followThePid: failed to set child subreaper: {os.strerror(ctypes.get_errno())}\n")
+
+    def die_with_reaper():
+        # Killing the reaper (e.g. on timeout) also kills the command
+        libc.prctl(PR_SET_PDEATHSIG, signal.SIGKILL, 0, 0, 0)
+
+    job = subprocess.Popen(args, preexec_fn=die_with_reaper)
+
+    for sig in (signal.SIGTERM, signal.SIGINT, signal.SIGHUP):
+        signal.signal(sig, lambda s, frame: job.send_signal(s))
+
+    # Reap the command and every orphan exiting before it
+    while job.returncode is None:
+        try:
+            pid, st = os.waitpid(-1, 0)
+        except ChildProcessError:
+            return 1
+        if pid == job.pid:
+            job.returncode = os.waitstatus_to_exitcode(st)  # no more signals forwarded to its PID
+
+    # Reap the orphans that have already exited, never wait for running ones
+    while True:
+        try:
+            pid, _ = os.waitpid(-1, os.WNOHANG)
+        except ChildProcessError:
+            break
+        if pid == 0:
+            break
+
+    return job.returncode
+
+
+if __name__ == "__main__":
+    code = main(sys.argv[1:])
+    if code < 0:
+        # Terminated by a signal: terminate the same way
+        signal.signal(-code, signal.SIG_DFL)
+        os.kill(os.getpid(), -code)
+    sys.exit(code)
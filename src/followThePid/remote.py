@@ -0,0 +1,328 @@
+import logging, os, socket, socketserver, stat, struct, threading, time
+from collections import deque
+import pandas as pd
+
+# Frame: header, job name, host name, then `count` fixed-size records
+HEADER = struct.Struct("!4sHHI")  # magic, len(job), len(host), count
+RECORD = struct.Struct("!dIddd")  # timestamp, pid, cpu_PIDs, cpu_system, energy (uJ)
+MAGIC = b"FTP1"
+MAX_RECORDS = 65_536  # per frame, bounds the memory a single frame can claim
+
+
+def encode_batch(job: str, host: str, records: list) -> bytes:
+    """
+    Encodes a batch of (timestamp, pid, cpu_PIDs, cpu_system, energy) records into a frame.
+    """
+    job_b, host_b = job.encode(), host.encode()
+    parts = [HEADER.pack(MAGIC, len(job_b), len(host_b), len(records)), job_b, host_b]
+    parts.extend(RECORD.pack(*r) for r in records)
+    return b"".join(parts)
+
+
+def _read_exactly(stream, size: int) -> bytes:
+    data = stream.read(size)
+    if len(data) < size:
+        raise EOFError("Connection closed in the middle of a frame")
+    return data
+
+
+def decode_batch(stream):
+    """
+    Reads one frame from a binary stream.
+    :return: (job, host, records) or None when the stream is exhausted.
+    """
+    head = stream.read(HEADER.size)
+    if not head:
+        return None
+    if len(head) < HEADER.size:
+        raise EOFError("Connection closed in the middle of a frame")
+
+    magic, job_len, host_len, count = HEADER.unpack(head)
+    if magic != MAGIC:
+        raise ValueError(f"Invalid frame magic: {magic!r}")
+    if count > MAX_RECORDS:
+        raise ValueError(f"Frame of {count} records exceeds the limit of {MAX_RECORDS}")
+
+    job = _read_exactly(stream, job_len).decode()
+    host = _read_exactly(stream, host_len).decode()
+    payload = _read_exactly(stream, RECORD.size * count)
+    records = list(RECORD.iter_unpack(payload))
+    return job, host, records
+
+
+def _connect(address, timeout: float):
+    """
+    Opens a TCP socket for a (host, port) address, a Unix domain socket for a path.
+    The timeout also bounds the connection attempt.
+    """
+    if not isinstance(address, str):
+        return socket.create_connection(address, timeout=timeout)
+
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.settimeout(timeout)
+    try:
+        sock.connect(address)
+    except OSError:
+        sock.close()
+        raise
+    return sock
+
+
+class Agent():
+    """
+    Streams the samples of a FollowThePid instance to a remote Collector.
+
+    Samples are queued in a bounded buffer and sent in batches by a background
+    thread, so a slow or unreachable collector never stalls sampling: when the
+    buffer is full the oldest samples are dropped. Batches that fail to be sent
+    are put back in the buffer and retried with exponential backoff.
+    """
+
+    MIN_BACKOFF = 0.1
+    MAX_BACKOFF = 5.0
+
+    def __init__(self, address, job: str, host: str = None, batch_size: int = 256,
+                 flush_interval: float = 0.5, max_buffer: int = 10_000, timeout: float = 2.0):
+        """
+        :param address: Collector address, (host, port) for TCP or a path for UDS.
+        :param job: Name of the job the samples belong to.
+        :param host: Name of this host, defaults to socket.gethostname().
+        :param batch_size: Maximum number of samples per frame, at most MAX_RECORDS.
+        :param flush_interval: Maximum time in seconds a sample waits before being sent.
+        :param max_buffer: Maximum number of buffered samples.
+        :param timeout: Socket timeout in seconds.
+        """
+        if not 0 < batch_size <= MAX_RECORDS:
+            raise ValueError(f"batch_size must be between 1 and {MAX_RECORDS}.")
+
+        self.address = address
+        self.job = job
+        self.host = host or socket.gethostname()
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.timeout = timeout
+
+        self.buffer = deque(maxlen=max_buffer)
+        self.cond = threading.Condition()
+        self.dropped = 0
+        self.sent = 0
+        self.sock = None
+        self.running = False
+        self.stopping = threading.Event()
+        self.sender_thread = None
+
+    def start(self):
+        """
+        Starts the background sender thread.
+        """
+        self.running = True
+        self.stopping.clear()
+        self.sender_thread = threading.Thread(target=self._send_loop, daemon=True)
+        self.sender_thread.start()
+
+    def push(self, sample, timestamp: float = None):
+        """
+        Queues a MetricSample, never blocks on the network.
+        """
+        record = (time.time() if timestamp is None else timestamp,
+                  sample.pid or 0, sample.cpu_PIDs, sample.cpu_system, sample.energy)
+        with self.cond:
+            if len(self.buffer) == self.buffer.maxlen:
+                self.dropped += 1
+            self.buffer.append(record)
+            if len(self.buffer) >= self.batch_size:
+                self.cond.notify()
+
+    def _next_batch(self) -> list:
+        with self.cond:
+            if len(self.buffer) < self.batch_size and self.running:
+                self.cond.wait(self.flush_interval)
+            count = min(len(self.buffer), self.batch_size)
+            return [self.buffer.popleft() for _ in range(count)]
+
+    def _send(self, batch: list) -> bool:
+        try:
+            if self.sock is None:
+                self.sock = _connect(self.address, self.timeout)
+            self.sock.sendall(encode_batch(self.job, self.host, batch))
+            self.sent += len(batch)
+            return True
+        except OSError as e:
+            logging.warning(f"Failed to send {len(batch)} samples to collector: {e}")
+            if self.sock is not None:
+                self.sock.close()
+                self.sock = None
+            return False
+
+    def _requeue(self, batch: list):
+        """
+        Puts a failed batch back at the front of the buffer, dropping its oldest
+        samples if the buffer has been filled in the meantime.
+        """
+        with self.cond:
+            room = self.buffer.maxlen - len(self.buffer)
+            keep = batch[len(batch) - room:] if room < len(batch) else batch
+            self.dropped += len(batch) - len(keep)
+            self.buffer.extendleft(reversed(keep))
+
+    def _send_loop(self):
+        backoff = 0.0
+        while self.running or self.buffer:
+            batch = self._next_batch()
+            if not batch:
+                continue
+            if self._send(batch):
+                backoff = 0.0
+                continue
+
+            if not self.running:
+                # Closing with an unreachable collector: give up on the remaining samples
+                with self.cond:
+                    self.dropped += len(batch) + len(self.buffer)
+                    self.buffer.clear()
+                break
+
+            self._requeue(batch)
+            backoff = min(max(backoff * 2, self.MIN_BACKOFF), self.MAX_BACKOFF)
+            self.stopping.wait(backoff)  # close() interrupts the backoff
+
+    def close(self):
+        """
+        Flushes the buffered samples and stops the sender thread.
+        """
+        with self.cond:
+            self.running = False
+            self.cond.notify()
+        self.stopping.set()
+        if self.sender_thread and self.sender_thread.is_alive():
+            self.sender_thread.join()
+        if self.sock is not None:
+            self.sock.close()
+            self.sock = None
+
+
+class _CollectorHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        try:
+            while True:
+                batch = decode_batch(self.rfile)
+                if batch is None:
+                    break
+                self.server.collector.add_batch(*batch)
+        except (EOFError, ValueError, OSError) as e:
+            logging.warning(f"Dropping agent connection: {e}")
+
+
+class _TCPServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+class _UnixServer(socketserver.ThreadingUnixStreamServer):
+    daemon_threads = True
+
+    def server_bind(self):
+        _remove_stale_socket(self.server_address)
+        super().server_bind()
+
+
+def _remove_stale_socket(path: str):
+    """
+    Removes a socket file left by a collector that is no longer running.
+    """
+    try:
+        if not stat.S_ISSOCK(os.stat(path).st_mode):
+            return  # not a socket, let bind() fail
+    except FileNotFoundError:
+        return
+
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        probe.connect(path)
+    except ConnectionRefusedError:
+        os.unlink(path)
+    except OSError:
+        pass
+    else:
+        raise OSError(f"A collector is already listening on {path}")
+    finally:
+        probe.close()
+
+
+class Collector():
+    """
+    Receives samples from many Agents and merges them into one time-aligned store.
+    """
+
+    COLUMNS = ["job", "host", "timestamp", "pid", "cpu_PIDs", "cpu_system", "energy_uj"]
+
+    def __init__(self, address=("127.0.0.1", 0)):
+        """
+        :param address: Listening address, (host, port) for TCP or a path for UDS.
+        """
+        if isinstance(address, str):
+            self.server = _UnixServer(address, _CollectorHandler)
+        else:
+            self.server = _TCPServer(address, _CollectorHandler)
+        self.server.collector = self
+        self.address = self.server.server_address
+
+        self.lock = threading.Lock()
+        self.records = []  # (job, host, timestamp, pid, cpu_PIDs, cpu_system, energy)
+        self.server_thread = None
+
+    def start(self):
+        """
+        Starts serving agents in a background thread.
+        """
+        self.server_thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.server_thread.start()
+        logging.info(f"Collector listening on {self.address}")
+
+    def add_batch(self, job: str, host: str, records: list):
+        with self.lock:
+            self.records.extend((job, host) + tuple(r) for r in records)
+
+    def samples_pandas(self, job: str = None):
+        """
+        Returns the collected samples as a Pandas DataFrame sorted by timestamp.
+        """
+        with self.lock:
+            records = list(self.records)
+
+        df = pd.DataFrame(records, columns=self.COLUMNS)
+        if job is not None:
+            df = df[df["job"] == job]
+        return df.sort_values("timestamp", kind="stable").reset_index(drop=True)
+
+    def samples_aligned(self, job: str, resolution: float = 1.0):
+        """
+        Returns the attributed energy (Joules) of a job per time bin and host.
+        """
+        df = self.samples_pandas(job)
+        df = df[df["cpu_system"] > 0]
+        df = df.assign(
+            time=(df["timestamp"] // resolution) * resolution,
+            energy_j=df["energy_uj"] * (df["cpu_PIDs"] / df["cpu_system"]) / 1_000_000,
+        )
+        return df.pivot_table(index="time", columns="host", values="energy_j", aggfunc="sum", fill_value=0.0)
+
+    def get_job_energy(self, job: str) -> float:
+        """
+        Returns the total energy consumed by a job across all hosts in Joules.
+        """
+        return float(self.samples_aligned(job).to_numpy().sum())
+
+    def close(self):
+        """
+        Stops the server and releases the socket.
+        """
+        if self.server_thread is not None:
+            self.server.shutdown()
+            self.server_thread.join()
+        self.server.server_close()
+        if isinstance(self.address, str):
+            try:
+                os.unlink(self.address)
+            except FileNotFoundError:
+                pass
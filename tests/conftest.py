@@ -32,3 +32,11 @@ def dummy_metrics(monkeypatch):
     m.get_pid_energy = lambda: 42.0
     monkeypatch.setattr("followThePid.controller.MetricsHandler", lambda *a, **k: m)
     return m
+
+@pytest.fixture
+def make_sample():
+    """MetricSample factory"""
+    def make(pid=1, cpu_PIDs=0.5, cpu_system=0.5, energy=1_000_000, interval=0.1):
+        return types.SimpleNamespace(pid=pid, cpu_PIDs=cpu_PIDs, cpu_system=cpu_system,
+                                     energy=energy, interval=interval)
+    return make
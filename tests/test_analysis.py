@@ -0,0 +1,67 @@
+import os
+import pytest
+from followThePid.analysis import analyze_traces, summarize_trace
+from followThePid.metrics import MetricSample, MetricsHandler
+
+def _write_trace(path, n, pid=1):
+    metrics = MetricsHandler()
+    for i in range(n):
+        metrics.add_sample(MetricSample(pid=pid, cpu_PIDs=0.25, cpu_system=0.5, energy=1_000_000 + i, interval=0.1))
+    metrics.samples_csv(str(path))
+    return metrics.get_pid_energy()
+
+def test_summarize_trace_matches_get_pid_energy(tmp_path):
+    """
+    Test that the vectorized summary matches MetricsHandler.get_pid_energy.
+    """
+    expected = _write_trace(tmp_path / "a.csv", 250)
+    summary = summarize_trace(str(tmp_path / "a.csv"), idle_power=5.0, chunksize=100)
+    assert summary["samples"] == 250
+    assert summary["energy_j"] == pytest.approx(expected)
+    assert summary["dynamic_energy_j"] == pytest.approx(expected - 250 * 0.5 * 0.5)
+    assert summary["duration_s"] == pytest.approx(25.0)
+
+def test_analyze_traces_uses_cache(tmp_path, monkeypatch):
+    """
+    Test that analyze_traces combines many traces and only re-parses new ones.
+    """
+    traces = tmp_path / "traces"
+    traces.mkdir()
+    expected = sum(_write_trace(traces / f"t{i}.csv", 10 + i, pid=i) for i in range(4))
+    cache_dir = str(tmp_path / "cache")
+
+    df = analyze_traces(str(traces / "*.csv"), max_workers=2, cache_dir=cache_dir)
+    assert list(df["file"])[-1] == "TOTAL"
+    assert len(df) == 5
+    assert df["energy_j"].iloc[-1] == pytest.approx(expected)
+
+    def fail(*a, **k):
+        raise AssertionError("cached traces should not be parsed again")
+    monkeypatch.setattr("followThePid.analysis.ProcessPoolExecutor", fail)
+    again = analyze_traces(str(traces / "*.csv"), max_workers=2, cache_dir=cache_dir)
+    assert again["energy_j"].iloc[-1] == pytest.approx(expected)
+
+    monkeypatch.undo()
+    os.link(traces / "t0.csv", traces / "copy.csv")  # same content, new path, reused by hash
+    df = analyze_traces(str(traces / "*.csv"), max_workers=2, cache_dir=cache_dir)
+    assert len(df) == 6
+    rows = df.set_index("file")
+    assert rows.loc[str(traces / "copy.csv"), "energy_j"] == rows.loc[str(traces / "t0.csv"), "energy_j"]
+
+def test_analyze_traces_skips_bad_files(tmp_path):
+    """
+    Test that empty or malformed traces are reported without aborting the run, and that the cache is written.
+    """
+    expected = _write_trace(tmp_path / "good.csv", 10)
+    (tmp_path / "empty.csv").write_text("")
+    (tmp_path / "bad.csv").write_text("foo,bar\n1,2\n")
+    (tmp_path / "text.csv").write_text("pid,cpu_PIDs,cpu_system,energy_uj,interval_s\n1,a,b,c,0.1\n")
+    cache_dir = tmp_path / "cache"
+
+    df = analyze_traces(str(tmp_path / "*.csv"), max_workers=2, cache_dir=str(cache_dir))
+    rows = df.set_index("file")
+    assert rows.loc[str(tmp_path / "empty.csv"), "error"].startswith("EmptyDataError")
+    assert rows.loc[str(tmp_path / "bad.csv"), "error"].startswith("KeyError")
+    assert rows.loc[str(tmp_path / "text.csv"), "error"].startswith("ValueError")
+    assert rows.loc["TOTAL", "energy_j"] == pytest.approx(expected)
+    assert (cache_dir / "followThePid_analysis_cache.json").exists()
@@ -0,0 +1,80 @@
+import signal
+import time
+import types
+import pytest
+from followThePid.budget import EnergyBudget
+
+def _process():
+    p = types.SimpleNamespace(signals=[], killed=False, niceness=0)
+    p.send_signal = lambda sig: p.signals.append(sig)
+    p.kill = lambda: setattr(p, "killed", True)
+    p.nice = lambda value=None: p.niceness if value is None else setattr(p, "niceness", value)
+    return p
+
+@pytest.fixture
+def tree(monkeypatch):
+    """Process tree returned by each rescan of the budget"""
+    processes = [_process()]
+    monkeypatch.setattr(EnergyBudget, "_get_process_tree", staticmethod(lambda pid: list(processes)))
+    return processes
+
+def test_budget_requires_a_threshold():
+    """
+    Test that a budget without thresholds or with an unknown action is rejected.
+    """
+    with pytest.raises(ValueError):
+        EnergyBudget()
+    with pytest.raises(ValueError):
+        EnergyBudget(max_power=1.0, action="unknown")
+
+def test_duty_cycle_stops_and_resumes(tree, make_sample):
+    """
+    Test that exceeding max_power stops the tree and that tick() resumes it after the pause,
+    without waiting for a new sample.
+    """
+    p = tree[0]
+    budget = EnergyBudget(max_power=5.0, window=1.0, pause=0.15)
+
+    assert budget.update(make_sample(), 1, now=0.0) is False
+    assert budget.update(make_sample(), 1, now=0.1) is False  # 20 W
+    assert p.signals == [signal.SIGSTOP]
+
+    budget.tick(now=0.2)
+    assert p.signals == [signal.SIGSTOP]
+    budget.tick(now=0.3)
+    assert p.signals == [signal.SIGSTOP, signal.SIGCONT]
+    assert [d[1] for d in budget.decisions] == ["stop", "resume"]
+
+def test_actions_reach_children_spawned_later(tree, make_sample):
+    """
+    Test that the tree is rescanned when an action is applied.
+    """
+    budget = EnergyBudget(max_power=5.0, action="nice")
+    budget.update(make_sample(), 1, now=0.0)
+    tree.append(_process())  # child spawned after the first sample
+    budget.update(make_sample(), 1, now=0.1)
+    assert [p.niceness for p in tree] == [5, 5]
+
+def test_energy_budget_kills_job(tree, make_sample):
+    """
+    Test that exceeding max_energy kills the tree and reports it.
+    """
+    budget = EnergyBudget(max_energy=1.5)
+    assert budget.update(make_sample(), 1, now=0.0) is False
+    assert budget.update(make_sample(), 1, now=10.0) is True
+    assert tree[0].killed
+
+def test_monitor_enforces_budget(dummy_device, dummy_cpu, dummy_metrics):
+    """
+    Test that monitor(budget=...) kills the job once the energy budget is exceeded.
+    """
+    from followThePid.controller import FollowThePid
+    monitor = FollowThePid(cmd="sleep 10")
+    budget = EnergyBudget(max_energy=0.001)
+
+    start = time.time()
+    monitor.monitor(timeout=20, budget=budget)
+
+    assert time.time() - start < 5
+    assert monitor.process.wait(timeout=5) != 0
+    assert [d[1] for d in budget.decisions] == ["kill"]
@@ -0,0 +1,74 @@
+import pytest
+from followThePid.calibration import PowerModel, get_power_model
+from followThePid.metrics import MetricSample, MetricsHandler
+
+def test_power_model_cache_roundtrip(tmp_path):
+    """
+    Test that a PowerModel is cached on disk keyed by CPU model and sockets.
+    """
+    model = PowerModel(idle_power=10.0, slope=40.0, cpu_model="Intel(R) Xeon(R) Gold", sockets=2)
+    model.save(str(tmp_path))
+
+    loaded = PowerModel.load("Intel(R) Xeon(R) Gold", 2, str(tmp_path))
+    assert loaded.idle_power == 10.0
+    assert loaded.predict(0.5) == 30.0
+    assert PowerModel.load("Intel(R) Xeon(R) Gold", 1, str(tmp_path)) is None
+
+def test_get_power_model_reuses_cache(tmp_path, monkeypatch):
+    """
+    Test that a cached model is loaded instead of recalibrating.
+    """
+    monkeypatch.setattr("followThePid.calibration.get_cpu_model", lambda: "cpu")
+    PowerModel(idle_power=5.0, slope=20.0, cpu_model="cpu", sockets=1).save(str(tmp_path))
+
+    def fail(*a, **k):
+        raise AssertionError("calibrate should not be called")
+    monkeypatch.setattr("followThePid.calibration.calibrate", fail)
+
+    assert get_power_model(device=None, sockets=1, cache_dir=str(tmp_path)).idle_power == 5.0
+
+def test_dynamic_energy_attribution():
+    """
+    Test that idle energy is removed before attributing energy to the process.
+    """
+    metrics = MetricsHandler()
+    metrics.add_sample(MetricSample(pid=1, cpu_PIDs=0.5, cpu_system=1.0, energy=3_000_000, interval=0.1))
+    assert metrics.get_pid_energy() == pytest.approx(1.5)
+    assert metrics.get_pid_energy(idle_power=10.0) == pytest.approx(1.0)
+
+def test_dynamic_only_requires_power_model(dummy_device, dummy_cpu, dummy_metrics):
+    """
+    Test that dynamic_only attribution fails without a power model.
+    """
+    from followThePid.controller import FollowThePid, ProcessEnergyMonitorError
+    f = FollowThePid(cmd="ls")
+    with pytest.raises(ProcessEnergyMonitorError):
+        f.get_pid_energy(dynamic_only=True)
+
+def test_monitor_resets_energy_counter(dummy_device, dummy_cpu):
+    """
+    Test that energy accumulated before monitor() (e.g. during calibrate()) is not billed to the first sample.
+    """
+    from followThePid.controller import FollowThePid
+    readings = iter([1e9])
+    dummy_device.get_energy = lambda: next(readings, 10.0)
+
+    f = FollowThePid(cmd="sleep 0.2")
+    f.monitor(timeout=5)
+    assert f.metrics.samples
+    assert max(s.energy for s in f.metrics.samples) == 10.0
+
+def test_skipped_measurements_keep_their_energy(dummy_device, dummy_cpu, monkeypatch):
+    """
+    Test that energy read during skipped measurements is added to the next sample, so that
+    energy and interval of each sample cover the same period.
+    """
+    from followThePid.controller import FollowThePid
+    dummy_device.get_energy = lambda: 10.0
+    systems = iter([None, None, 0.5, None, 0.5])
+    dummy_cpu.get_cpu_system = lambda: next(systems)
+    monkeypatch.setattr("followThePid.controller.MetricSample", lambda **kw: kw)
+
+    f = FollowThePid(cmd="ls")
+    samples = [f._take_measurement() for _ in range(5)]
+    assert [s["energy"] for s in samples if s is not None] == [30.0, 20.0]
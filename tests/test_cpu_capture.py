@@ -0,0 +1,93 @@
+import ctypes
+import os
+import subprocess
+import sys
+import time
+import pytest
+from followThePid.cpu import CPUManager
+
+SPAWN_EXAMPLE = os.path.join(os.path.dirname(__file__), "..", "src", "followThePid", "example", "spawn_example.py")
+PR_GET_CHILD_SUBREAPER = 37
+
+def _is_subreaper() -> bool:
+    flag = ctypes.c_int(0)
+    ctypes.CDLL(None).prctl(PR_GET_CHILD_SUBREAPER, ctypes.byref(flag), 0, 0, 0)
+    return bool(flag.value)
+
+@pytest.mark.skipif(not sys.platform.startswith("linux"), reason="child subreaper is Linux only")
+def test_capture_exited_accounts_short_lived_children(dummy_device):
+    """
+    Test that the CPU time of short-lived (and orphaned) children is accounted in capture_exited mode,
+    without reaping unrelated children of the monitor nor making it a subreaper.
+    """
+    from followThePid.controller import FollowThePid
+    children, burn_s = 40, 0.01
+    unrelated = subprocess.Popen(["sh", "-c", "sleep 0.2; exit 3"])
+
+    monitor = FollowThePid(cmd=f"{sys.executable} {SPAWN_EXAMPLE} {children} {burn_s} 2",
+                           sampling_interval=0.05, capture_exited=True)
+    monitor.monitor(timeout=30)
+
+    samples = monitor.metrics.samples
+    cpu_time = sum(s.cpu_PIDs * s.interval * monitor.cpu.num_cores for s in samples)
+    assert cpu_time >= 0.9 * children * burn_s
+    assert all(s.cpu_PIDs <= s.cpu_system for s in samples)
+    assert monitor.process.returncode == 0
+
+    assert unrelated.wait(timeout=5) == 3
+    assert not _is_subreaper()
+
+def test_capture_exited_spreads_bursts(monkeypatch):
+    """
+    Test that CPU time above the limit (e.g. a child that exited between samples) is
+    carried over to the next samples instead of being reported in a single one.
+    """
+    cpu = CPUManager(sampling_interval=0.1, num_cores=1, capture_exited=True)
+    times = iter([1.2, 1.2, 1.2])
+    monkeypatch.setattr(cpu, "get_cpu_time", lambda: next(times))
+    clock = iter([1.0, 2.0, 3.0])
+    monkeypatch.setattr("followThePid.cpu.time.monotonic", lambda: next(clock))
+
+    cpu.last_time = 0.0
+    assert cpu.get_cpu_usage(limit=0.5) == pytest.approx(0.5)
+    assert cpu.get_cpu_usage(limit=0.5) == pytest.approx(0.5)
+    assert cpu.get_cpu_usage(limit=0.5) == pytest.approx(0.2)
+
+def test_capture_exited_usage_is_normalized(monkeypatch):
+    """
+    Test that CPU time deltas are normalized by elapsed time and cores, and that
+    transient negative deltas are paid back instead of lost.
+    """
+    cpu = CPUManager(sampling_interval=0.1, num_cores=2, capture_exited=True)
+    times = iter([1.0, 0.8, 2.0])
+    monkeypatch.setattr(cpu, "get_cpu_time", lambda: next(times))
+    clock = iter([1.0, 2.0, 3.0])
+    monkeypatch.setattr("followThePid.cpu.time.monotonic", lambda: next(clock))
+
+    cpu.last_time = 0.0
+    assert cpu.get_cpu_usage() == pytest.approx(0.5)
+    assert cpu.get_cpu_usage() == 0.0
+    assert cpu.get_cpu_usage() == pytest.approx(0.5)
+
+@pytest.mark.skipif(not sys.platform.startswith("linux"), reason="child subreaper is Linux only")
+def test_capture_exited_does_not_wait_for_background_processes(dummy_device):
+    """
+    Test that monitoring ends with the command, even if it leaves a background process running.
+    """
+    from followThePid.controller import FollowThePid
+    monitor = FollowThePid(cmd="sh -c 'sleep 20 & exit 0'", capture_exited=True)
+
+    start = time.time()
+    monitor.monitor(timeout=10)
+    assert time.time() - start < 5
+    assert monitor.process.returncode == 0
+
+@pytest.mark.parametrize("capture_exited", [False, True])
+def test_missing_command_raises(dummy_device, capture_exited):
+    """
+    Test that a missing command raises FileNotFoundError in both modes.
+    """
+    from followThePid.controller import FollowThePid
+    monitor = FollowThePid(cmd="no-such-cmd-xyz", capture_exited=capture_exited)
+    with pytest.raises(FileNotFoundError):
+        monitor.monitor(timeout=5)
@@ -0,0 +1,118 @@
+import io
+import os
+import multiprocessing
+import socket
+import time
+import types
+import pytest
+from followThePid.remote import Agent, Collector, HEADER, MAGIC, encode_batch, decode_batch
+
+def _run_agent(address, host, n):
+    agent = Agent(tuple(address), job="job", host=host, batch_size=16, flush_interval=0.05)
+    agent.start()
+    for i in range(n):
+        sample = types.SimpleNamespace(pid=i, cpu_PIDs=0.5, cpu_system=0.5, energy=1_000_000)
+        agent.push(sample, timestamp=1000.0 + i * 0.1)
+    agent.close()
+
+def test_encode_decode_roundtrip():
+    """
+    Test that a batch survives the binary encoding.
+    """
+    records = [(1.5, 42, 0.25, 0.5, 10.0), (2.5, 43, 0.1, 0.2, 20.0)]
+    stream = io.BytesIO(encode_batch("job", "host-a", records))
+    assert decode_batch(stream) == ("job", "host-a", records)
+    assert decode_batch(stream) is None
+
+def test_agent_drops_oldest_when_collector_is_down(make_sample):
+    """
+    Test that the agent buffer is bounded and push never blocks without a collector.
+    """
+    agent = Agent(("127.0.0.1", 1), job="job", max_buffer=4)
+    start = time.time()
+    for _ in range(10):
+        agent.push(make_sample())
+    assert time.time() - start < 0.5
+    assert len(agent.buffer) == 4
+    assert agent.dropped == 6
+
+def test_collector_merges_multiple_agent_processes():
+    """
+    Test end to end aggregation of several agent processes on localhost.
+    """
+    collector = Collector(("127.0.0.1", 0))
+    collector.start()
+    try:
+        procs = [
+            multiprocessing.Process(target=_run_agent, args=(collector.address, f"host-{i}", 50))
+            for i in range(3)
+        ]
+        for p in procs:
+            p.start()
+        for p in procs:
+            p.join(timeout=10)
+            assert p.exitcode == 0
+
+        deadline = time.time() + 5
+        while len(collector.samples_pandas()) < 150 and time.time() < deadline:
+            time.sleep(0.05)
+
+        df = collector.samples_pandas("job")
+        assert len(df) == 150
+        assert df["timestamp"].is_monotonic_increasing
+
+        aligned = collector.samples_aligned("job", resolution=1.0)
+        assert sorted(aligned.columns) == ["host-0", "host-1", "host-2"]
+        assert collector.get_job_energy("job") == 150.0
+    finally:
+        collector.close()
+
+def test_agent_retries_after_collector_outage(tmp_path, make_sample):
+    """
+    Test that batches failing during a collector outage are kept and delivered later.
+    """
+    address = str(tmp_path / "collector.sock")
+    agent = Agent(address, job="job", batch_size=4, flush_interval=0.05)
+    agent.start()
+    for i in range(10):
+        agent.push(make_sample(pid=i))
+    time.sleep(0.3)  # sends fail, nothing is listening yet
+
+    collector = Collector(address)
+    collector.start()
+    try:
+        deadline = time.time() + 5
+        while agent.sent < 10 and time.time() < deadline:
+            time.sleep(0.05)
+        agent.close()
+        assert agent.dropped == 0
+        assert sorted(collector.samples_pandas("job")["pid"]) == list(range(10))
+    finally:
+        collector.close()
+
+def test_decode_rejects_oversized_frames():
+    """
+    Test that a frame announcing more than MAX_RECORDS records is rejected before reading its payload.
+    """
+    stream = io.BytesIO(HEADER.pack(MAGIC, 0, 0, 0xFFFFFFFF))
+    with pytest.raises(ValueError):
+        decode_batch(stream)
+    with pytest.raises(ValueError):
+        Agent(("127.0.0.1", 1), job="job", batch_size=0xFFFFFFFF)
+
+def test_collector_unix_socket_is_reusable(tmp_path):
+    """
+    Test that the UDS socket file is removed on close and that a stale one does not prevent binding.
+    """
+    address = str(tmp_path / "collector.sock")
+    collector = Collector(address)
+    collector.start()
+    collector.close()
+    assert not os.path.exists(address)
+
+    stale = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    stale.bind(address)  # left behind by a crashed collector
+    stale.close()
+    collector = Collector(address)
+    collector.start()
+    collector.close()